@@ -1,223 +1,596 @@
+import asyncio
 import base64
-import json
 import os
 import sys
-import time
 import argparse
-from typing import Dict, List, Any, Optional
+import importlib.util
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from functools import lru_cache
+from typing import AsyncIterator, Collection, DefaultDict, Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
+# Select a compiled protobuf backend before ord_schema imports protobuf: "upb" ships in
+# protobuf >= 4.21 wheels, "cpp" in older ones. An explicit user setting is left alone.
+if "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION" not in os.environ:
+    for _backend, _module in (("upb", "google._upb._message"), ("cpp", "google.protobuf.pyext._message")):
+        try:
+            if importlib.util.find_spec(_module) is not None:
+                os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = _backend
+                break
+        except ImportError:
+            continue
+
+try:
+    import ahocorasick
+    import aiohttp
+    import diskcache
+    import ijson
+    import orjson
+    from ord_schema.proto import reaction_pb2
+    from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+    from google.protobuf.descriptor import Descriptor, FieldDescriptor
+    from google.protobuf.internal import api_implementation
+    from google.protobuf.message import DecodeError
+except ImportError as e:
+    print(f"ERROR: missing dependency ({e.name}). Run 'pip install ord-schema aiohttp diskcache ijson orjson pyahocorasick'.", file=sys.stderr)
+    sys.exit(1)
 
 
 API_BASE = "https://open-reaction-database.org/api"
 USER_AGENT = "ORD-Scraper-Advanced/3.0"
 CORE_CATEGORIES = {"base", "solvent", "amine", "aryl halide", "metal", "ligand"}
 REACTION_TIMEOUT_S = 90
+CACHE_DIR = os.path.expanduser("~/.ord_scrape_cache")
+WRITE_BATCH_SIZE = 1024
+WRITE_BUFFER_BYTES = 1 << 20
+FSYNC_EVERY_BATCHES = 16
+# Reactions per worker task; one IPC round trip per reaction cost more than the parse itself.
+PARSE_CHUNK_SIZE = 256
+HTTP_TIMEOUT_S = 30
+MAX_CONCURRENT_DATASETS = 8
+# Keep the pool comfortably above MAX_CONCURRENT_DATASETS: every dataset can have a poll in
+# flight while others submit or fetch, and an undersized pool queues requests and forces
+# fresh TLS handshakes. All traffic goes to one host, so the per-host limit is what binds.
+HTTP_POOL_LIMIT = 64
+HTTP_POOL_LIMIT_PER_HOST = 16
+HTTP_KEEPALIVE_S = 30
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POLL_MIN_S = 0.05
+POLL_MAX_S = 5.0
+POLL_BACKOFF_FACTOR = 2.0
+RATE_LIMIT_STEP_S = 0.25
+RATE_LIMIT_MAX_S = 30.0
+RATE_LIMIT_RECOVERY = 10
+
+# Built once so the per-component loop is a dict lookup instead of an enum Name() call.
+# ReactionRole is a message wrapping the ReactionRoleType enum used by Compound.reaction_role.
+_ROLE_NAMES = {v.number: v.name for v in reaction_pb2.ReactionRole.ReactionRoleType.DESCRIPTOR.values}
+
+# The only Reaction fields extract_reaction_data reads: a dict descends into a message
+# field, None keeps a scalar. Unlisted fields are not dropped: every backend keeps them as
+# unknown-field bytes. That only saves time on the pure-Python backend, which then skips
+# building their sub-message objects; upb and cpp parse it as fast as the full Reaction.
+_REACTION_FIELDS = {
+    "reaction_id": None,
+    "inputs": {
+        "components": {
+            "identifiers": {"value": None},
+            "reaction_role": None,
+        },
+    },
+    "outcomes": {"products": {}},
+}
+_SUBSET_PACKAGE = "ord_scraper.subset"
 
+# normalized input key -> output bucket; the same few keys recur across a whole dataset.
+_KEY_BUCKET: Dict[str, str] = {}
 
+# One linear scan finds the earliest core category inside a key, instead of a substring
+# search per category.
+_CORE_AUTOMATON = ahocorasick.Automaton()
+for _core_key in CORE_CATEGORIES:
+    _CORE_AUTOMATON.add_word(_core_key, _core_key)
+_CORE_AUTOMATON.make_automaton()
 
-def make_session() -> requests.Session:
-    """Creates a requests session with retry logic for robust API calls."""
-    session = requests.Session()
-    retries = Retry(
-        total=5,
-        connect=5,
-        read=5,
-        backoff_factor=1.0,  
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"],
-        raise_on_status=False,
+# Protobuf decoding is CPU-bound; workers are only spawned on first use.
+_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+
+def make_session() -> aiohttp.ClientSession:
+    """Creates an aiohttp session with a bounded connection pool for concurrent API calls."""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_S
     )
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-    session.headers.update({
-        "User-Agent": USER_AGENT,
-        "Accept": "application/json",
-    })
-    return session
-
-def submit_query(session: requests.Session, dataset_id: str, limit: int) -> str:
+    return aiohttp.ClientSession(
+        connector=connector,
+        # Per-socket-operation limits like requests' timeout=; a total limit would also cap
+        # how long a large result body may take to download.
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=HTTP_TIMEOUT_S, sock_read=HTTP_TIMEOUT_S),
+        headers={
+            "User-Agent": USER_AGENT,
+            "Accept": "application/json",
+        },
+    )
+
+def _retry_after(resp: aiohttp.ClientResponse) -> Optional[float]:
+    """Returns the server's Retry-After delay in seconds, if it sent one."""
+    try:
+        return max(0.0, float(resp.headers["Retry-After"]))
+    except (KeyError, ValueError):
+        return None
+
+class _RateLimiter:
+    """
+    Adaptive spacing between requests to one host. Requests go out unthrottled until the
+    host answers 429; each 429 doubles the spacing (and honors Retry-After), and every
+    RATE_LIMIT_RECOVERY consecutive successes halve it again, back down to zero.
+    """
+
+    def __init__(self) -> None:
+        self.min_interval = 0.0
+        self._next_slot = 0.0
+        self._successes = 0
+
+    async def wait(self) -> None:
+        """Sleeps until this request's slot and reserves the following one."""
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def record(self, resp: aiohttp.ClientResponse) -> None:
+        """Adjusts the spacing from the status of a finished request."""
+        if resp.status == 429:
+            self._successes = 0
+            self.min_interval = min(max(self.min_interval * 2, RATE_LIMIT_STEP_S), RATE_LIMIT_MAX_S)
+            retry_after = _retry_after(resp)
+            if retry_after is not None:
+                now = asyncio.get_running_loop().time()
+                self._next_slot = max(self._next_slot, now + retry_after)
+        elif resp.status < 400:
+            self._successes += 1
+            if self._successes >= RATE_LIMIT_RECOVERY:
+                self._successes = 0
+                self.min_interval /= 2
+                if self.min_interval < RATE_LIMIT_STEP_S:
+                    self.min_interval = 0.0
+
+_RATE_LIMITS: Dict[str, _RateLimiter] = defaultdict(_RateLimiter)
+
+@asynccontextmanager
+async def _get(
+    session: aiohttp.ClientSession,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    retries: int = MAX_RETRIES,
+    retry_statuses: Collection[int] = RETRY_STATUSES,
+) -> AsyncIterator[aiohttp.ClientResponse]:
+    """GETs a URL through the host's rate limiter, retrying transient failures with backoff."""
+    limiter = _RATE_LIMITS[urlsplit(url).netloc]
+    for attempt in range(retries + 1):
+        delay = 1.0 * 2 ** attempt
+        await limiter.wait()
+        try:
+            resp = await session.get(url, params=params)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+        else:
+            limiter.record(resp)
+            if resp.status not in retry_statuses or attempt == retries:
+                try:
+                    yield resp
+                finally:
+                    resp.release()
+                return
+            if resp.status == 429:
+                # The limiter has already pushed this host's next slot back.
+                delay = 0.0
+            resp.release()
+        await asyncio.sleep(delay)
+
+async def submit_query(session: aiohttp.ClientSession, dataset_id: str, limit: int) -> str:
     """Submits a query to fetch reactions and returns the task ID."""
     url = f"{API_BASE}/submit_query"
     params = {"dataset_id": dataset_id, "limit": limit}
-    resp = session.get(url, params=params, timeout=30)
-    resp.raise_for_status()
-    
-    return resp.text.strip().strip('"')
+    async with _get(session, url, params=params) as resp:
+        resp.raise_for_status()
+        text = await resp.text()
+
+    return text.strip().strip('"')
 
-def fetch_query_result(session: requests.Session, task_id: str) -> List[Dict]:
-    """Polls for query results until ready or timeout."""
+async def fetch_query_result(
+    session: aiohttp.ClientSession,
+    task_id: str,
+    poll_min: float = POLL_MIN_S,
+    poll_max: float = POLL_MAX_S,
+    factor: float = POLL_BACKOFF_FACTOR
+) -> List[Dict]:
+    """Polls for query results with exponential backoff until ready or timeout."""
     url = f"{API_BASE}/fetch_query_result"
     params = {"task_id": task_id}
-    start_time = time.time()
-    
-    while time.time() - start_time < REACTION_TIMEOUT_S:
-        resp = session.get(url, params=params, timeout=30)
-        
-        if resp.status_code == 200:
-            try:
-                return resp.json()
-            except json.JSONDecodeError:
-                return []
-        
-        
-        elif resp.status_code == 202:
-            time.sleep(2.0)
-            continue
-        
-        
-        elif resp.status_code == 400 and "not ready" in resp.text.lower():
-            time.sleep(2.0)
-            continue
-        
-        resp.raise_for_status() 
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+    delay = poll_min
+
+    while loop.time() - start_time < REACTION_TIMEOUT_S:
+        # Transient statuses are handled by this loop's backoff rather than _get's retries.
+        async with _get(session, url, params=params, retry_statuses=()) as resp:
+            if resp.status == 200:
+                try:
+                    return orjson.loads(await resp.read())
+                except orjson.JSONDecodeError:
+                    return []
+
+
+            not_ready = resp.status == 202 or (
+                resp.status == 400 and "not ready" in (await resp.text()).lower()
+            )
+            if not not_ready and resp.status not in RETRY_STATUSES:
+                resp.raise_for_status()
+
+            retry_after = _retry_after(resp)
+
+        await asyncio.sleep(delay if retry_after is None else retry_after)
+        delay = min(delay * factor, poll_max)
 
     raise TimeoutError(f"Query result for task={task_id} timed out after {REACTION_TIMEOUT_S}s.")
 
 
 
+def check_protobuf_backend() -> None:
+    """Warns when protobuf fell back to its pure-Python parser, which is 10-40x slower."""
+    backend = api_implementation.Type()
+    if backend in ("cpp", "upb"):
+        return
+    print(
+        f"WARNING: protobuf is using the '{backend}' backend; reaction parsing will be slow.\n"
+        "  Reinstall the binary wheels with 'pip install --force-reinstall protobuf'.\n"
+        "  On platforms without wheels, build protobuf with --cpp_implementation.",
+        file=sys.stderr
+    )
+
+def _add_subset_message(
+    file_proto: descriptor_pb2.FileDescriptorProto,
+    full: Descriptor,
+    fields: Dict[str, Any],
+    name: str
+) -> None:
+    """Adds a copy of `full` to `file_proto` keeping only `fields`, with their original numbers."""
+    msg = file_proto.message_type.add(name=name)
+    for field_name, sub_fields in fields.items():
+        fd = full.fields_by_name[field_name]
+        # FieldDescriptor.label was replaced by is_repeated in newer protobuf releases.
+        repeated = fd.is_repeated if hasattr(fd, "is_repeated") else fd.label == FieldDescriptor.LABEL_REPEATED
+        label = FieldDescriptor.LABEL_REPEATED if repeated else FieldDescriptor.LABEL_OPTIONAL
+        field = msg.field.add(name=fd.name, number=fd.number, label=label)
+
+        if fd.message_type is None:
+            if sub_fields is not None:
+                raise ValueError(f"{full.full_name}.{field_name} is a scalar field and has no sub-fields")
+            # Enums are plain varints on the wire, so the subset doesn't need the enum types.
+            field.type = FieldDescriptor.TYPE_INT32 if fd.type == FieldDescriptor.TYPE_ENUM else fd.type
+            continue
+
+        child = f"{name}_{field_name}"
+        target = fd.message_type
+        field.type = FieldDescriptor.TYPE_MESSAGE
+        field.type_name = f".{_SUBSET_PACKAGE}.{child}"
+
+        if target.GetOptions().map_entry:
+            entry = msg.nested_type.add(name=target.name)
+            entry.options.map_entry = True
+            entry.field.add(name="key", number=1, label=FieldDescriptor.LABEL_OPTIONAL,
+                            type=target.fields_by_name["key"].type)
+            entry.field.add(name="value", number=2, label=FieldDescriptor.LABEL_OPTIONAL,
+                            type=FieldDescriptor.TYPE_MESSAGE, type_name=f".{_SUBSET_PACKAGE}.{child}")
+            field.type_name = f".{_SUBSET_PACKAGE}.{name}.{target.name}"
+            target = target.fields_by_name["value"].message_type
+
+        _add_subset_message(file_proto, target, sub_fields, child)
+
+def _build_reaction_subset():
+    """Builds a message class exposing just the `_REACTION_FIELDS` of serialized Reaction bytes."""
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name="ord_scraper_subset.proto",
+        package=_SUBSET_PACKAGE,
+        syntax="proto3"
+    )
+    _add_subset_message(file_proto, reaction_pb2.Reaction.DESCRIPTOR, _REACTION_FIELDS, "Reaction")
+
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    desc = pool.FindMessageTypeByName(f"{_SUBSET_PACKAGE}.Reaction")
+    if hasattr(message_factory, "GetMessageClass"):
+        return message_factory.GetMessageClass(desc)
+    return message_factory.MessageFactory(pool).GetPrototype(desc)
+
+_ReactionSubset = _build_reaction_subset()
+
 def decode_reaction_proto(proto_b64: str):
-    """Decodes base64-encoded reaction Protocol Buffer data using ord_schema."""
-    try:
-        from ord_schema.proto import reaction_pb2
-    except ImportError:
-        print("ERROR: ord-schema is not installed. Run 'pip install ord-schema requests'.", file=sys.stderr)
-        sys.exit(1)
-        
-    raw = base64.b64decode(proto_b64)
-    rxn = reaction_pb2.Reaction()
-    rxn.ParseFromString(raw)
-    return rxn
+    """Decodes base64-encoded reaction Protocol Buffer data into the reduced Reaction message."""
+    # validate=True rejects non-alphabet characters instead of silently dropping them, so a
+    # corrupt payload raises binascii.Error (a ValueError) rather than decoding to garbage.
+    return _ReactionSubset.FromString(base64.b64decode(proto_b64, validate=True))
 
 def extract_identifiers(compound) -> str:
     """Extracts and joins all non-empty compound identifier values."""
-    texts = []
-    for ident in compound.identifiers:
-        if ident.value:
-            texts.append(ident.value)
-    return "; ".join(texts)
+    # A list comprehension beats a generator here: join() materializes its argument anyway.
+    return "; ".join([ident.value for ident in compound.identifiers if ident.value])
+
+@lru_cache(maxsize=4096)
+def _normalize_key(input_key: str) -> str:
+    """Normalizes an input key once per distinct key; the same few recur across a dataset."""
+    return input_key.strip().lower().replace("_", " ")
+
+def classify_input_key(normalized_key: str) -> str:
+    """Maps a normalized input key to the first core category it contains, else to itself."""
+    bucket = _KEY_BUCKET.get(normalized_key)
+    if bucket is None:
+        bucket = next((k for _, k in _CORE_AUTOMATON.iter(normalized_key)), normalized_key)
+        _KEY_BUCKET[normalized_key] = bucket
+    return bucket
 
 def extract_reaction_data(rxn, dataset_id: str) -> Dict[str, Any]:
     """
-    Parses a decoded Reaction protobuf object to extract structured data.
+    Parses a decoded (reduced) Reaction protobuf object to extract structured data.
     """
-    extracted_roles: Dict[str, List[Dict]] = {k: [] for k in CORE_CATEGORIES}
-    
-    try:
-        
-        outcome_successful = False
-        if rxn.outcomes and rxn.outcomes[0].reaction_product:
-            outcome_successful = True 
+    extracted_roles: DefaultDict[str, List[Dict]] = defaultdict(list)
 
-        
-        for input_key, reaction_input in rxn.inputs.items():
-            normalized_key = input_key.strip().lower().replace("_", " ")
+    outcomes = rxn.outcomes
+    outcome_successful = len(outcomes) > 0 and len(outcomes[0].products) > 0
 
-            for component in reaction_input.components:
-                text_id = extract_identifiers(component)
-                
-                if not text_id:
-                    continue
-                
-                
-                try:
-                    from ord_schema.proto import reaction_pb2
-                    role_name = reaction_pb2.ReactionRole.Name(component.reaction_role)
-                except Exception:
-                    role_name = "UNKNOWN"
-
-                comp_data = {
-                    "value": text_id,
-                    "role": role_name
-                }
-                
-                
-                assigned = False
-                for core_key in CORE_CATEGORIES:
-                    if core_key in normalized_key:
-                        extracted_roles[core_key].append(comp_data)
-                        assigned = True
-                        break
-                
-                
-                if not assigned:
-                    extracted_roles.setdefault(normalized_key, []).append(comp_data)
-                    
-        return {
-            "dataset_id": dataset_id,
-            "reaction_id": rxn.reaction_id.value,
-            "components": extracted_roles,
-            "success": outcome_successful
-        }
     
+    for input_key, reaction_input in rxn.inputs.items():
+        normalized_key = _normalize_key(input_key)
+        bucket = classify_input_key(normalized_key)
+
+        for component in reaction_input.components:
+            text_id = extract_identifiers(component)
+            
+            if not text_id:
+                continue
+            
+            
+            role_name = _ROLE_NAMES.get(component.reaction_role, "UNKNOWN")
+
+            comp_data = {
+                "value": text_id,
+                "role": role_name
+            }
+            
+            extracted_roles[bucket].append(comp_data)
+
+    # Every core category stays in the output; empty ones share an immutable () instead
+    # of each reaction allocating its own empty list.
+    components: Dict[str, Any] = {k: extracted_roles.get(k, ()) for k in CORE_CATEGORIES}
+    components.update(extracted_roles)
+
+    return {
+        "dataset_id": dataset_id,
+        "reaction_id": rxn.reaction_id,
+        "components": components,
+        "success": outcome_successful
+    }
+
+
+
+def _parse_one(dataset_id: str, proto_b64: str) -> Optional[Dict[str, Any]]:
+    """
+    Decodes and extracts one reaction in a worker process, returning a picklable dict,
+    or None when the payload is not valid base64 or protobuf.
+    """
+    try:
+        rxn = decode_reaction_proto(proto_b64)
+    except (ValueError, DecodeError):
+        return None
+
+    # Read up front so the error row below cannot fail on the same field access.
+    reaction_id = getattr(rxn, "reaction_id", "")
+    try:
+        return extract_reaction_data(rxn, dataset_id)
     except Exception as e:
-        print(f"Warning: Failed to extract data for reaction {rxn.reaction_id.value}: {e}", file=sys.stderr)
+        print(f"Warning: Failed to extract data for reaction {reaction_id}: {e}", file=sys.stderr)
         return {
             "dataset_id": dataset_id,
-            "reaction_id": rxn.reaction_id.value,
+            "reaction_id": reaction_id,
             "error": str(e)
         }
 
+def _parse_many(dataset_id: str, protos: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """Runs `_parse_one` over a chunk of payloads in a single worker task."""
+    return [_parse_one(dataset_id, proto_b64) for proto_b64 in protos]
 
+class _JsonlWriter:
+    """
+    Appends results to a JSONL file in batches of WRITE_BATCH_SIZE rows, so each write
+    call carries many rows; the file is fsynced every FSYNC_EVERY_BATCHES batches.
+    Full batches are written from a worker thread so the disk never stalls the event loop.
+    """
 
-def scrape_ord_advanced(
-    max_datasets: Optional[int],
-    per_dataset_limit: int,
-    dataset_ids: Optional[List[str]]
-) -> List[Dict]:
-    """Coordinates the entire scraping process."""
-    session = make_session()
-    all_results: List[Dict] = []
-    processed_count = 0
-    
-    print("Fetching list of all datasets...", file=sys.stderr)
-    datasets = session.get(f"{API_BASE}/datasets", timeout=30).json()
-    
-    if dataset_ids:
-        
-        datasets = [d for d in datasets if d.get("dataset_id") in dataset_ids]
-    
-    print(f"Found {len(datasets)} datasets matching criteria.", file=sys.stderr)
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "wb", buffering=WRITE_BUFFER_BYTES)
+        self._batch: List[bytes] = []
+        self._batches_written = 0
+        # One flush at a time, so batches from concurrent datasets land whole and in order.
+        self._flush_lock = asyncio.Lock()
 
-    for ds in datasets:
-        dataset_id = ds.get("dataset_id")
-        num_rxns = ds.get("num_reactions", 0)
-        
-        if max_datasets is not None and processed_count >= max_datasets:
-            break
-            
-        print(f"\n[{processed_count + 1}] Processing: {dataset_id} ({num_rxns} total reactions)", file=sys.stderr)
-        
+    async def write(self, data: Dict[str, Any]) -> None:
+        """Serializes one row, flushing the batch off the event loop once it is full."""
+        self._batch.append(orjson.dumps(data))
+        if len(self._batch) >= WRITE_BATCH_SIZE:
+            batch, self._batch = self._batch, []
+            async with self._flush_lock:
+                await asyncio.to_thread(self._write_batch, batch)
+
+    def _write_batch(self, batch: List[bytes]) -> None:
+        if not batch:
+            return
+        self._file.write(b"\n".join(batch) + b"\n")
+
+        self._batches_written += 1
+        if self._batches_written % FSYNC_EVERY_BATCHES == 0:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Writes any remaining rows and closes the file; call once no writes are pending."""
         try:
-            effective_limit = per_dataset_limit if per_dataset_limit > 0 else num_rxns
-            
-            task_id = submit_query(session, dataset_id, limit=effective_limit)
-            items = fetch_query_result(session, task_id)
-            
-            print(f"  -> Retrieved {len(items)} reactions for parsing.", file=sys.stderr)
-            
-            for item in items:
-                proto_b64 = item.get("proto")
-                if not proto_b64:
+            self._write_batch(self._batch)
+            self._batch = []
+        finally:
+            self._file.close()
+
+    def __enter__(self) -> "_JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+
+async def fetch_datasets(
+    session: aiohttp.ClientSession,
+    dataset_ids: Optional[List[str]],
+    max_datasets: Optional[int]
+) -> List[Dict]:
+    """
+    Stream-parses the dataset index, keeping only the id and reaction count of the
+    datasets selected, so the full index is never held in memory.
+    """
+    wanted = set(dataset_ids) if dataset_ids else None
+    datasets: List[Dict] = []
+
+    async with _get(session, f"{API_BASE}/datasets") as resp:
+        resp.raise_for_status()
+        async for d in ijson.items(resp.content, "item"):
+            dataset_id = d.get("dataset_id")
+            if wanted is not None and dataset_id not in wanted:
+                continue
+
+            # Checked before appending so the cap behaves like a datasets[:max_datasets] slice.
+            if max_datasets is not None and len(datasets) >= max_datasets:
+                break
+            datasets.append({"dataset_id": dataset_id, "num_reactions": d.get("num_reactions", 0)})
+
+    return datasets
+
+def _effective_limit(ds: Dict, per_dataset_limit: int) -> int:
+    """Returns how many reactions to request for a dataset (0 means all of them)."""
+    return per_dataset_limit if per_dataset_limit > 0 else ds.get("num_reactions", 0)
+
+def _cache_key(dataset_id: str, limit: int) -> Tuple[str, str, int]:
+    """Builds the disk-cache key under which a dataset's raw base64 payloads are stored."""
+    return (API_BASE, dataset_id, limit)
+
+async def process_dataset(
+    sem: asyncio.Semaphore,
+    session: aiohttp.ClientSession,
+    index: int,
+    ds: Dict,
+    per_dataset_limit: int,
+    submission: Optional["asyncio.Task[str]"],
+    out: _JsonlWriter,
+    cache: Optional[diskcache.Cache]
+) -> int:
+    """
+    Polls and parses a single dataset, streaming its rows to `out`. Returns the row count.
+    `submission` is the already-queued submit_query task for the dataset, if any. Raw proto
+    payloads are read from / stored in `cache` when one is given.
+    """
+    dataset_id = ds.get("dataset_id")
+    num_rxns = ds.get("num_reactions", 0)
+
+    try:
+        async with sem:
+            print(f"\n[{index}] Processing: {dataset_id} ({num_rxns} total reactions)", file=sys.stderr)
+
+            effective_limit = _effective_limit(ds, per_dataset_limit)
+            cache_key = _cache_key(dataset_id, effective_limit)
+            # Raw payloads are cached, not decoded results, so extractor changes apply on re-runs.
+            # diskcache is synchronous sqlite + pickle; keep it off the event loop.
+            protos = await asyncio.to_thread(cache.get, cache_key) if cache is not None else None
+
+            if protos is None:
+                if submission is None:
+                    submission = asyncio.ensure_future(submit_query(session, dataset_id, limit=effective_limit))
+                task_id = await submission
+                items = await fetch_query_result(session, task_id)
+
+                print(f"  -> Retrieved {len(items)} reactions for parsing.", file=sys.stderr)
+
+                protos = [item["proto"] for item in items if item.get("proto")]
+                if cache is not None and protos:
+                    await asyncio.to_thread(cache.set, cache_key, protos)
+            else:
+                print(f"  -> Loaded {len(protos)} reactions from cache.", file=sys.stderr)
+
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(_POOL, _parse_many, dataset_id, protos[i:i + PARSE_CHUNK_SIZE])
+            for i in range(0, len(protos), PARSE_CHUNK_SIZE)
+        ]
+        written = 0
+        for future in asyncio.as_completed(futures):
+            for data in await future:
+                if data is None:
                     continue
-                
-                rxn = decode_reaction_proto(proto_b64)
-                data = extract_reaction_data(rxn, dataset_id)
-                all_results.append(data)
-                
-            processed_count += 1
-            
-        except Exception as e:
-            print(f"  -> ERROR during dataset {dataset_id} processing: {e}", file=sys.stderr)
-            all_results.append({"dataset_id": dataset_id, "error": str(e)})
-            
-        
-        time.sleep(1.0) 
-        
-    return all_results
+                await out.write(data)
+                written += 1
+
+        if written < len(protos):
+            print(f"  -> WARNING: skipped {len(protos) - written} malformed reactions in {dataset_id}.", file=sys.stderr)
+        return written
+
+    except Exception as e:
+        print(f"  -> ERROR during dataset {dataset_id} processing: {e}", file=sys.stderr)
+        await out.write({"dataset_id": dataset_id, "error": str(e)})
+        return 1
+
+async def scrape_ord_advanced(
+    max_datasets: Optional[int],
+    per_dataset_limit: int,
+    dataset_ids: Optional[List[str]],
+    json_out: str,
+    use_cache: bool = True
+) -> int:
+    """Coordinates the entire scraping process, streaming one JSON object per line to `json_out`."""
+    cache_ctx = diskcache.Cache(CACHE_DIR) if use_cache else nullcontext()
+    with _JsonlWriter(json_out) as out, cache_ctx as cache:
+        async with make_session() as session:
+            print("Fetching list of all datasets...", file=sys.stderr)
+            datasets = await fetch_datasets(session, dataset_ids, max_datasets)
+
+            print(f"Found {len(datasets)} datasets matching criteria.", file=sys.stderr)
+
+            # Queue every uncached query up front: the server computes them all while the
+            # earlier ones are being polled and parsed.
+            submissions: Dict[str, "asyncio.Task[str]"] = {}
+            for ds in datasets:
+                dataset_id = ds["dataset_id"]
+                limit = _effective_limit(ds, per_dataset_limit)
+                key = _cache_key(dataset_id, limit)
+                if cache is None or not await asyncio.to_thread(cache.__contains__, key):
+                    submissions[dataset_id] = asyncio.create_task(
+                        submit_query(session, dataset_id, limit=limit)
+                    )
+
+            print(f"Queued {len(submissions)} queries ({len(datasets) - len(submissions)} cached).", file=sys.stderr)
+
+            sem = asyncio.Semaphore(MAX_CONCURRENT_DATASETS)
+            counts = await asyncio.gather(*[
+                process_dataset(sem, session, i, ds, per_dataset_limit, submissions.get(ds["dataset_id"]), out, cache)
+                for i, ds in enumerate(datasets, start=1)
+            ])
+
+    return sum(counts)
 
 
 
@@ -232,6 +605,9 @@ Examples:
   
   # Scrape a specific dataset (all reactions)
   python ord_advanced_scraper.py --dataset_ids ord_dataset-3b7692e9d29b43179261358b13997fef --limit 0
+
+  # Output is JSON Lines (one reaction per line); re-aggregate into a JSON array with jq
+  jq -s . ord_scrape_results.jsonl > ord_scrape_results.json
         """
     )
     
@@ -256,19 +632,27 @@ Examples:
     )
     parser.add_argument(
         "--json_out",
-        default=os.path.join(os.getcwd(), "ord_scrape_results.json"),
-        help="Output JSON file path (default: ord_scrape_results.json)"
+        default=os.path.join(os.getcwd(), "ord_scrape_results.jsonl"),
+        help="Output JSON Lines file path (default: ord_scrape_results.jsonl)"
+    )
+    parser.add_argument(
+        "--no_cache",
+        action="store_true",
+        help=f"Always query the API instead of reusing reactions cached in {CACHE_DIR}."
     )
     
     args = parser.parse_args()
+    check_protobuf_backend()
     
     
     ds_ids: Optional[List[str]] = None
     if args.dataset_ids:
         ds_ids = [x.strip() for x in args.dataset_ids.split(",") if x.strip()]
         
-    if args.max_datasets == 0 and not ds_ids:
-        print("\n!!! WARNING: You requested ALL datasets. This will take a long time. !!!", file=sys.stderr)
+    # 0 means no cap, with or without --dataset_ids; only an unfiltered run warrants the warning.
+    if args.max_datasets == 0:
+        if not ds_ids:
+            print("\n!!! WARNING: You requested ALL datasets. This will take a long time. !!!", file=sys.stderr)
         args.max_datasets = None 
 
     print("\n" + "="*50, file=sys.stderr)
@@ -279,18 +663,16 @@ Examples:
     print("="*50 + "\n", file=sys.stderr)
     
     try:
-        rows = scrape_ord_advanced(
+        total = asyncio.run(scrape_ord_advanced(
             max_datasets=args.max_datasets,
             per_dataset_limit=args.per_dataset_limit,
-            dataset_ids=ds_ids
-        )
-        
-        
-        with open(args.json_out, "w", encoding="utf-8") as f:
-            json.dump(rows, f, ensure_ascii=False, indent=2)
+            dataset_ids=ds_ids,
+            json_out=args.json_out,
+            use_cache=not args.no_cache
+        ))
             
         print("\n" + "="*50, file=sys.stderr)
-        print(f" Scrape Complete! Total reactions processed: {len(rows)}", file=sys.stderr)
+        print(f" Scrape Complete! Total reactions processed: {total}", file=sys.stderr)
         print(f"File saved to: {args.json_out}", file=sys.stderr)
         print("="*50 + "\n", file=sys.stderr)
         
@@ -298,5 +680,8 @@ Examples:
         print(f"\n CRITICAL FAILURE: {e}", file=sys.stderr)
         sys.exit(1)
 
+    finally:
+        _POOL.shutdown()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file